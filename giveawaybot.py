@@ -2,7 +2,6 @@ import sys, types
 sys.modules['audioop'] = types.SimpleNamespace()
 
 import os
-import random
 import asyncio
 import pytz
 import asyncpg
@@ -22,22 +21,68 @@ print("Loaded admin roles:", ADMIN_ROLES)
 if not TOKEN or not DATABASE_URL:
     raise SystemExit("❌ Missing BOT_TOKEN or DATABASE_URL in environment variables.")
 
-intents = discord.Intents.default()
-intents.message_content = True
+# Slash commands and buttons arrive as interactions; only the guild cache (channels, roles) is needed.
+intents = discord.Intents.none()
 intents.guilds = True
-intents.members = True
 bot = commands.Bot(command_prefix="!", intents=intents)
 
 tz = pytz.timezone("Asia/Kolkata")
 start_time = datetime.now(tz)
+_started_str = start_time.strftime("%I:%M %p IST")
 status_message = None
+last_embed_state: tuple[str, str] | None = None
+
+_uptime_embed = discord.Embed(title=f"🎉 {SERVER_NAME} Giveaway Bot", color=discord.Color.green())
+_uptime_embed.add_field(name="START", value="", inline=False)
+_uptime_embed.add_field(name="UPTIME", value="", inline=False)
+_uptime_embed.add_field(name="LAST UPDATE", value="", inline=False)
 db_pool: asyncpg.Pool | None = None
+_status_channel_missing = False
+ALLOWED_ROLE_IDS: dict[int, frozenset[int]] = {}
+joined: set[tuple[int, int]] = set()  # (giveaway_id, user_id) pairs already stored
+_message_giveaways: dict[int, int] = {}  # message_id -> giveaway_id, for clicks through the persistent view
+_giveaway_timers: dict[int, asyncio.TimerHandle] = {}
+_finalize_tasks: set[asyncio.Task] = set()
+_load_task: asyncio.Task | None = None
+_unsaved_ended: set[int] = set()  # giveaways whose results were posted but ended = TRUE failed to save
+_retry_counts: dict[int, int] = {}
+FINALIZE_RETRY_DELAY = 30
+FINALIZE_MAX_RETRIES = 8
+
+# Enters the user only while the giveaway is running; returns its id and ended flag (no row if it doesn't exist).
+# Buttons routed through the persistent view carry giveaway id 0, so the giveaway is also matched by message id.
+JOIN_GIVEAWAY_SQL = """
+    WITH g AS (SELECT id, ended FROM giveaways WHERE id = $1 OR message_id = $2 LIMIT 1),
+    ins AS (
+        INSERT INTO participants (giveaway_id, user_id)
+        SELECT g.id, $3 FROM g WHERE NOT g.ended
+        ON CONFLICT DO NOTHING
+    )
+    SELECT id, ended FROM g
+"""
+
+_UPTIME_FMT = "%02dd:%02dh:%02dm"
 
 def format_uptime(delta: timedelta) -> str:
-    days = delta.days
     hours, rem = divmod(delta.seconds, 3600)
-    minutes, seconds = divmod(rem, 60)
-    return f"{days:02}d:{hours:02}h:{minutes:02}m:{seconds:02}s"
+    return _UPTIME_FMT % (delta.days, hours, rem // 60)
+
+async def status_channel():
+    """The status channel, or None if unavailable; only a confirmed NotFound is remembered as missing."""
+    global _status_channel_missing
+    if _status_channel_missing:
+        return None
+    channel = bot.get_channel(STATUS_CHANNEL_ID)
+    if channel is not None:
+        return channel
+    # Cache misses can be transient (cache refill after READY, guild outage), so ask the API before latching.
+    try:
+        return await bot.fetch_channel(STATUS_CHANNEL_ID)
+    except discord.NotFound:
+        _status_channel_missing = True
+    except discord.HTTPException as e:
+        print(f"⚠️ Status channel lookup failed: {e}")
+    return None
 
 async def init_db(pool: asyncpg.Pool) -> None:
     async with pool.acquire() as conn:
@@ -53,6 +98,17 @@ async def init_db(pool: asyncpg.Pool) -> None:
             ended BOOLEAN DEFAULT FALSE
         )
         """)
+        # Tables created before end_time was timezone-aware stored naive UTC values.
+        await conn.execute("""
+        DO $$
+        BEGIN
+            IF EXISTS (SELECT 1 FROM information_schema.columns
+                       WHERE table_schema = current_schema() AND table_name = 'giveaways' AND column_name = 'end_time'
+                       AND data_type = 'timestamp without time zone') THEN
+                ALTER TABLE giveaways ALTER COLUMN end_time TYPE TIMESTAMPTZ USING end_time AT TIME ZONE 'UTC';
+            END IF;
+        END $$
+        """)
         await conn.execute("""
         CREATE TABLE IF NOT EXISTS participants (
             giveaway_id INT REFERENCES giveaways(id) ON DELETE CASCADE,
@@ -60,41 +116,77 @@ async def init_db(pool: asyncpg.Pool) -> None:
             PRIMARY KEY (giveaway_id, user_id)
         )
         """)
-        await conn.execute("CREATE INDEX IF NOT EXISTS ix_giveaways_end ON giveaways (ended, end_time)")
+        # Partial index: only still-running giveaways, which is all the startup scheduler ever scans.
+        await conn.execute("CREATE INDEX IF NOT EXISTS ix_giveaways_active ON giveaways (end_time) WHERE ended = FALSE")
+        await conn.execute("DROP INDEX IF EXISTS ix_giveaways_end")
         await conn.execute("CREATE INDEX IF NOT EXISTS ix_participants_gid ON participants (giveaway_id)")
+        await conn.execute("CREATE INDEX IF NOT EXISTS ix_giveaways_message ON giveaways (message_id)")
 
-@tasks.loop(seconds=20)
+async def create_db_pool(attempts: int = 3, delay: float = 5.0) -> asyncpg.Pool | None:
+    for attempt in range(1, attempts + 1):
+        print(f"🔌 Connecting to PostgreSQL... (attempt {attempt}/{attempts})")
+        pool = None
+        try:
+            pool = await asyncpg.create_pool(
+                DATABASE_URL,
+                min_size=5,
+                max_size=20,
+                max_inactive_connection_lifetime=300,
+                statement_cache_size=1024,
+                command_timeout=30,
+            )
+            await init_db(pool)
+            print("✅ Connected to PostgreSQL & ensured tables.")
+            return pool
+        except Exception as e:
+            print(f"❌ PostgreSQL connection failed: {e}")
+            if pool is not None:
+                await pool.close()
+            if attempt < attempts:
+                await asyncio.sleep(delay * attempt)
+    return None
+
+@tasks.loop(seconds=60)
 async def update_uptime():
-    global status_message
+    global status_message, last_embed_state
     now = datetime.now(tz)
     uptime = format_uptime(now - start_time)
-    last_update = now.strftime("%I:%M:%S %p IST")
-    started = start_time.strftime("%I:%M %p IST")
-
-    embed = discord.Embed(title=f"🎉 {SERVER_NAME} Giveaway Bot", color=discord.Color.green())
-    embed.add_field(name="START", value=f"```{started}```", inline=False)
-    embed.add_field(name="UPTIME", value=f"```{uptime}```", inline=False)
-    embed.add_field(name="LAST UPDATE", value=f"```{last_update}```", inline=False)
+    last_update = now.strftime("%I:%M %p IST")
+    # Only guards ticks that drift into the same minute as the last edit.
+    embed_state = (uptime, last_update)
+    if embed_state == last_embed_state:
+        return
 
-    channel = bot.get_channel(STATUS_CHANNEL_ID)
+    channel = await status_channel()
     if not channel:
+        if _status_channel_missing:
+            print(f"❌ Status channel {STATUS_CHANNEL_ID} not found, stopping uptime updates.")
+            update_uptime.stop()
         return
+
+    _uptime_embed.set_field_at(0, name="START", value=f"```{_started_str}```", inline=False)
+    _uptime_embed.set_field_at(1, name="UPTIME", value=f"```{uptime}```", inline=False)
+    _uptime_embed.set_field_at(2, name="LAST UPDATE", value=f"```{last_update}```", inline=False)
     try:
         if not status_message and UPTIME_MSG_ID:
             status_message = await channel.fetch_message(UPTIME_MSG_ID)
         if status_message:
-            await status_message.edit(embed=embed)
+            await status_message.edit(embed=_uptime_embed)
+            last_embed_state = embed_state
     except Exception as e:
         print(f"❌ Uptime update error: {e}")
 
+def refresh_admin_roles(guild: discord.Guild) -> None:
+    ALLOWED_ROLE_IDS[guild.id] = frozenset(r.id for r in guild.roles if r.name.lower() in ADMIN_ROLES)
+
 def is_admin():
     async def predicate(interaction: discord.Interaction) -> bool:
         if interaction.user.guild_permissions.administrator:
             return True
-        if not ADMIN_ROLES:
+        allowed = ALLOWED_ROLE_IDS.get(interaction.guild_id)
+        if not allowed:
             return False
-        user_roles = {role.name.lower() for role in interaction.user.roles}
-        return not ADMIN_ROLES.isdisjoint(user_roles)
+        return not allowed.isdisjoint(role.id for role in interaction.user.roles)
     return app_commands.check(predicate)
 
 class GiveawayView(discord.ui.View):
@@ -106,24 +198,33 @@ class GiveawayView(discord.ui.View):
     async def enter_button(self, interaction: discord.Interaction, _button: discord.ui.Button):
         if db_pool is None:
             return await interaction.response.send_message("DB not ready. Try again.", ephemeral=True)
-        async with db_pool.acquire() as conn:
-            # Check if giveaway has ended
-            giveaway = await conn.fetchrow("SELECT ended FROM giveaways WHERE id = $1", self.giveaway_id)
-            if giveaway and giveaway['ended']:
-                await interaction.response.send_message("Sorry, this giveaway has already ended.", ephemeral=True)
-                return
-
-            await conn.execute("""
-                INSERT INTO participants (giveaway_id, user_id)
-                VALUES ($1, $2)
-                ON CONFLICT DO NOTHING
-            """, self.giveaway_id, interaction.user.id)
-        await interaction.response.send_message("✅ You're in!", ephemeral=True)
+        message_id = interaction.message.id
+        giveaway_id = self.giveaway_id or _message_giveaways.get(message_id)
+        if giveaway_id and (giveaway_id, interaction.user.id) in joined:
+            return await interaction.response.send_message("✅ Already in!", ephemeral=True)
+        # Acknowledge first so a slow insert can't outlive Discord's 3s interaction deadline.
+        await interaction.response.defer(ephemeral=True, thinking=False)
+        # Single statement, so the pool's short-form helper suffices; its plan comes from the statement cache.
+        try:
+            giveaway = await db_pool.fetchrow(JOIN_GIVEAWAY_SQL, self.giveaway_id, message_id, interaction.user.id)
+        except Exception as e:
+            print(f"❌ Giveaway entry failed: {e}")
+            await interaction.followup.send("❌ Couldn't enter, try again.", ephemeral=True)
+            return
+        if giveaway is None:
+            await interaction.followup.send("❌ Couldn't find this giveaway.", ephemeral=True)
+            return
+        if giveaway["ended"]:
+            await interaction.followup.send("Sorry, this giveaway has already ended.", ephemeral=True)
+            return
+        _message_giveaways[message_id] = giveaway["id"]
+        joined.add((giveaway["id"], interaction.user.id))
+        await interaction.followup.send("✅ You're in!", ephemeral=True)
 
 @bot.tree.command(name="epicgiveaway", description="Start a giveaway 🎁")
 @is_admin()
 @app_commands.describe(title="Giveaway Title", sponsor="Sponsor Name", duration="Duration in minutes", item="Giveaway Item", winners="Number of winners", channel="Channel to post the giveaway")
-async def epicgiveaway(interaction: discord.Interaction, title: str, sponsor: str, duration: int, item: str, winners: int, channel: discord.TextChannel):
+async def epicgiveaway(interaction: discord.Interaction, title: str, sponsor: str, duration: int, item: str, winners: app_commands.Range[int, 1, 40], channel: discord.TextChannel):
     await interaction.response.send_message(f"🎉 Giveaway started in {channel.mention}!", ephemeral=True)
     end_time_utc = datetime.now(timezone.utc) + timedelta(minutes=duration)
 
@@ -135,25 +236,26 @@ async def epicgiveaway(interaction: discord.Interaction, title: str, sponsor: st
     embed.set_footer(text=f"Started by {interaction.user.display_name}")
     embed.timestamp = discord.utils.utcnow()
 
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow("""
-            INSERT INTO giveaways (message_id, channel_id, end_time, prize, winners_count, host_id)
-            VALUES ($1, $2, $3, $4, $5, $6)
-            RETURNING id
-        """, 0, channel.id, end_time_utc, item, winners, interaction.user.id)
-        
-        giveaway_id = row['id']
-        view = GiveawayView(giveaway_id)
-        msg = await channel.send(embed=embed, view=view)
-        
-        # Update the message_id in the database now that we have it
-        await conn.execute("UPDATE giveaways SET message_id = $1 WHERE id = $2", msg.id, giveaway_id)
+    # Reserve the id first so the view can go out with the message in a single POST.
+    row = await db_pool.fetchrow("""
+        INSERT INTO giveaways (message_id, channel_id, end_time, prize, winners_count, host_id)
+        VALUES ($1, $2, $3, $4, $5, $6)
+        RETURNING id
+    """, 0, channel.id, end_time_utc, item, winners, interaction.user.id)
+
+    giveaway_id = row['id']
+    # Arm the end timer now: if the send below fails, the row still ends (as a missing message) instead of staying open.
+    schedule_giveaway(giveaway_id, end_time_utc)
+    view = GiveawayView(giveaway_id)
+    msg = await channel.send(embed=embed, view=view)
+
+    # Update the message_id in the database now that we have it
+    await db_pool.execute("UPDATE giveaways SET message_id = $1 WHERE id = $2", msg.id, giveaway_id)
 
 @bot.tree.command(name="dt", description="List all database tables")
 @is_admin()
 async def dt(interaction: discord.Interaction):
-    async with db_pool.acquire() as conn:
-        tables = await conn.fetch("SELECT table_name FROM information_schema.tables WHERE table_schema='public'")
+    tables = await db_pool.fetch("SELECT table_name FROM information_schema.tables WHERE table_schema='public'")
     table_list = "\n".join([t["table_name"] for t in tables]) or "No tables found."
     await interaction.response.send_message(f"**Tables:**\n```\n{table_list}\n```", ephemeral=True)
 
@@ -161,11 +263,10 @@ async def dt(interaction: discord.Interaction):
 @is_admin()
 @app_commands.describe(tablename="Name of the table to view")
 async def view_table(interaction: discord.Interaction, tablename: str):
-    async with db_pool.acquire() as conn:
-        try:
-            rows = await conn.fetch(f"SELECT * FROM {tablename} LIMIT 20")
-        except Exception as e:
-            return await interaction.response.send_message(f"❌ Error: {e}", ephemeral=True)
+    try:
+        rows = await db_pool.fetch(f"SELECT * FROM {tablename} LIMIT 20")
+    except Exception as e:
+        return await interaction.response.send_message(f"❌ Error: {e}", ephemeral=True)
     if not rows:
         await interaction.response.send_message("No data found.", ephemeral=True)
     else:
@@ -215,58 +316,188 @@ async def get_msg_id(interaction: discord.Interaction):
     )
 # --- END OF NEW COMMAND ---
 
-@tasks.loop(seconds=15)
-async def check_giveaways():
-    if db_pool is None:
+async def _finalize(row) -> int | None:
+    """Post the result of an ended giveaway; returns its id once it can be marked ended."""
+    giveaway_id = row["id"]
+    try:
+        channel = bot.get_channel(row["channel_id"]) or await bot.fetch_channel(row["channel_id"])
+        msg = await channel.fetch_message(row["message_id"])
+    except discord.NotFound:
+        return giveaway_id
+
+    result_embed = discord.Embed(title="🎉 Giveaway Ended!", color=discord.Color.red())
+    result_embed.add_field(name="🎁 Prize", value=row["prize"] or "Not specified", inline=False)
+
+    if not row["entries"] or row["entries"] < row["winners_count"]:
+        winners_text = "Not enough participants to determine a winner."
+    else:
+        winners_text = ", ".join(f"<@{uid}>" for uid in row["winners"])
+
+    result_embed.add_field(name="🏆 Winner(s)", value=winners_text, inline=False)
+    result_embed.set_footer(text="Giveaway concluded.")
+
+    await msg.edit(embed=result_embed, view=None)
+    return giveaway_id
+
+async def finalize_giveaways(giveaway_ids: list[int]) -> None:
+    if db_pool is None or not giveaway_ids:
         return
-    async with db_pool.acquire() as conn:
-        ended_giveaways = await conn.fetch("SELECT * FROM giveaways WHERE end_time <= NOW() AND ended = FALSE")
-        for row in ended_giveaways:
-            giveaway_id = row["id"]
-            channel = bot.get_channel(row["channel_id"])
-            if not channel:
-                await conn.execute("UPDATE giveaways SET ended = TRUE WHERE id = $1", giveaway_id)
-                continue
-            
-            try:
-                msg = await channel.fetch_message(row["message_id"])
-            except discord.NotFound:
-                await conn.execute("UPDATE giveaways SET ended = TRUE WHERE id = $1", giveaway_id)
-                continue
-
-            participants = await conn.fetch("SELECT user_id FROM participants WHERE giveaway_id = $1", giveaway_id)
-            user_ids = [p["user_id"] for p in participants]
-            
-            result_embed = discord.Embed(title="🎉 Giveaway Ended!", color=discord.Color.red())
-            result_embed.add_field(name="🎁 Prize", value=row["prize"] or "Not specified", inline=False)
-
-            if not user_ids or len(user_ids) < row['winners_count']:
-                winners_text = "Not enough participants to determine a winner."
-            else:
-                winners = random.sample(user_ids, k=min(row["winners_count"], len(user_ids)))
-                winners_text = ", ".join(f"<@{uid}>" for uid in winners)
-
-            result_embed.add_field(name="🏆 Winner(s)", value=winners_text, inline=False)
-            result_embed.set_footer(text="Giveaway concluded.")
-            
-            await msg.edit(embed=result_embed, view=None)
-            await conn.execute("UPDATE giveaways SET ended = TRUE WHERE id = $1", giveaway_id)
+    # Results already posted but not saved as ended: only the UPDATE is retried, winners aren't redrawn.
+    ended_ids = [gid for gid in giveaway_ids if gid in _unsaved_ended]
+    pending = [gid for gid in giveaway_ids if gid not in _unsaved_ended]
+    failed: list[int] = []
+
+    if pending:
+        try:
+            ended_giveaways = await db_pool.fetch("""
+                SELECT g.id, g.message_id, g.channel_id, g.prize, g.winners_count,
+                       (SELECT count(*) FROM participants p WHERE p.giveaway_id = g.id) AS entries,
+                       ARRAY(SELECT p.user_id FROM participants p WHERE p.giveaway_id = g.id
+                             ORDER BY random() LIMIT GREATEST(g.winners_count, 0)) AS winners
+                FROM giveaways g
+                WHERE g.id = ANY($1::int[]) AND g.ended = FALSE
+            """, pending)
+        except Exception as e:
+            print(f"❌ Failed to load giveaways {pending}: {e}")
+            ended_giveaways = []
+            failed.extend(pending)
+
+        # Discord calls run without holding a pool connection.
+        results = await asyncio.gather(*(_finalize(row) for row in ended_giveaways), return_exceptions=True)
+        for row, result in zip(ended_giveaways, results):
+            if isinstance(result, Exception):
+                if _is_permanent_failure(result) or _retry_counts.get(row["id"], 0) >= FINALIZE_MAX_RETRIES:
+                    # Retrying can't help; close the giveaway without results rather than looping forever.
+                    print(f"❌ Giving up on giveaway {row['id']}, marking it ended: {result}")
+                    ended_ids.append(row["id"])
+                else:
+                    print(f"❌ Failed to end giveaway {row['id']}: {result}")
+                    failed.append(row["id"])
+            elif result is not None:
+                ended_ids.append(result)
+
+    if ended_ids:
+        try:
+            await db_pool.execute("UPDATE giveaways SET ended = TRUE WHERE id = ANY($1::int[])", ended_ids)
+        except Exception as e:
+            print(f"❌ Failed to mark giveaways {ended_ids} as ended: {e}")
+            _unsaved_ended.update(ended_ids)
+            failed.extend(ended_ids)
+        else:
+            ended = set(ended_ids)
+            _unsaved_ended.difference_update(ended)
+            for gid in ended:
+                _retry_counts.pop(gid, None)
+            joined.difference_update([key for key in joined if key[0] in ended])
+            for message_id in [mid for mid, gid in _message_giveaways.items() if gid in ended]:
+                del _message_giveaways[message_id]
+
+    for gid in failed:
+        retry_giveaway(gid)
+
+def _is_permanent_failure(error: BaseException) -> bool:
+    # 4xx (Forbidden, bad request) won't change on retry; 429 is the rate limiter and is worth retrying.
+    return isinstance(error, discord.HTTPException) and 400 <= error.status < 500 and error.status != 429
+
+def retry_giveaway(giveaway_id: int) -> None:
+    """Re-arm a giveaway whose finalization failed, backing off up to an hour, for at most FINALIZE_MAX_RETRIES."""
+    attempt = _retry_counts.get(giveaway_id, 0)
+    if attempt >= FINALIZE_MAX_RETRIES:
+        print(f"❌ Giving up on giveaway {giveaway_id} after {attempt} retries.")
+        _retry_counts.pop(giveaway_id, None)
+        return
+    _retry_counts[giveaway_id] = attempt + 1
+    delay = min(FINALIZE_RETRY_DELAY * 2 ** attempt, 3600)
+    print(f"🔁 Retrying giveaway {giveaway_id} in {delay}s.")
+    schedule_giveaway(giveaway_id, datetime.now(timezone.utc) + timedelta(seconds=delay))
+
+def _run_finalize(giveaway_id: int) -> None:
+    _giveaway_timers.pop(giveaway_id, None)
+    task = asyncio.create_task(finalize_giveaways([giveaway_id]))
+    _finalize_tasks.add(task)
+    task.add_done_callback(_finalize_tasks.discard)
+
+def schedule_giveaway(giveaway_id: int, end_time: datetime) -> None:
+    """Arm a timer that ends the giveaway at end_time (immediately if already past)."""
+    delay = max(0.0, (end_time - datetime.now(timezone.utc)).total_seconds())
+    old = _giveaway_timers.pop(giveaway_id, None)
+    if old:
+        old.cancel()
+    _giveaway_timers[giveaway_id] = asyncio.get_running_loop().call_later(delay, _run_finalize, giveaway_id)
+
+async def schedule_pending_giveaways() -> None:
+    rows = await db_pool.fetch("SELECT id, end_time FROM giveaways WHERE ended = FALSE")
+    now = datetime.now(timezone.utc)
+    overdue = [row["id"] for row in rows if row["end_time"] <= now]
+    for row in rows:
+        if row["end_time"] > now:
+            schedule_giveaway(row["id"], row["end_time"])
+    print(f"⏰ Scheduled {len(rows) - len(overdue)} active giveaway(s), ending {len(overdue)} overdue.")
+    await finalize_giveaways(overdue)
+
+async def load_pending_giveaways(delay: float = 5.0) -> None:
+    """Rebuild giveaway timers, retrying with backoff until the DB answers."""
+    attempt = 0
+    while True:
+        try:
+            await schedule_pending_giveaways()
+            return
+        except Exception as e:
+            wait = min(delay * 2 ** attempt, 300)
+            attempt += 1
+            print(f"❌ Failed to schedule pending giveaways: {e} (retrying in {wait}s)")
+            await asyncio.sleep(wait)
+
+@bot.event
+async def on_guild_role_create(role: discord.Role):
+    refresh_admin_roles(role.guild)
+
+@bot.event
+async def on_guild_role_update(_before: discord.Role, after: discord.Role):
+    refresh_admin_roles(after.guild)
+
+@bot.event
+async def on_guild_role_delete(role: discord.Role):
+    refresh_admin_roles(role.guild)
+
+@bot.event
+async def on_guild_join(guild: discord.Guild):
+    refresh_admin_roles(guild)
+
+@bot.event
+async def on_guild_available(guild: discord.Guild):
+    # Guilds that were unavailable at READY arrive here rather than through on_guild_join.
+    refresh_admin_roles(guild)
+
+@bot.event
+async def on_guild_remove(guild: discord.Guild):
+    global _status_channel_missing
+    ALLOWED_ROLE_IDS.pop(guild.id, None)
+    if guild.get_channel(STATUS_CHANNEL_ID):
+        _status_channel_missing = True
+
+@bot.event
+async def on_guild_channel_delete(channel: discord.abc.GuildChannel):
+    global _status_channel_missing
+    if channel.id == STATUS_CHANNEL_ID:
+        _status_channel_missing = True
 
 @bot.event
 async def on_connect():
-    global start_time
+    global start_time, _started_str
     start_time = datetime.now(tz)
+    _started_str = start_time.strftime("%I:%M %p IST")
 
 @bot.event
 async def on_ready():
-    global db_pool
-    print("🔌 Connecting to PostgreSQL...")
-    try:
-        db_pool = await asyncpg.create_pool(DATABASE_URL, min_size=1, max_size=10)
-        await init_db(db_pool)
-        print("✅ Connected to PostgreSQL & ensured tables.")
-    except Exception as e:
-        print(f"❌ PostgreSQL connection failed: {e}")
+    global db_pool, _load_task
+    for guild in bot.guilds:
+        refresh_admin_roles(guild)
+    if db_pool is not None:
+        # on_ready fires again after gateway reconnects; keep the existing pool.
+        return
+    db_pool = await create_db_pool()
+    if db_pool is None:
         return
 
     # Add persistent view for giveaways
@@ -283,7 +514,26 @@ async def on_ready():
     
     if STATUS_CHANNEL_ID and UPTIME_MSG_ID:
         update_uptime.start()
-    check_giveaways.start()
+    _load_task = asyncio.create_task(load_pending_giveaways())
+
+async def main() -> None:
+    discord.utils.setup_logging()
+    async with bot:
+        await bot.start(TOKEN)
 
 if __name__ == "__main__":
-    bot.run(TOKEN)
+    try:
+        import uvloop
+    except ImportError:
+        uvloop = None
+
+    if uvloop is not None and sys.version_info >= (3, 12):
+        try:
+            asyncio.run(main(), loop_factory=uvloop.new_event_loop)
+        except KeyboardInterrupt:
+            pass
+    else:
+        # Older interpreters have no loop_factory; fall back to the (pre-3.12) policy hook.
+        if uvloop is not None:
+            uvloop.install()
+        bot.run(TOKEN)